@@ -1,16 +1,41 @@
 # Standard library imports
 import os
 import logging
+import logging.handlers
+import queue
 import sqlite3
 import time
 import socket
-from datetime import datetime
+import functools
+import atexit
+import hashlib
+import json
+import gzip
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from configparser import ConfigParser
 
 # Third-party imports
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
 from cryptography.fernet import Fernet
 
+# Faster JSON encoding/decoding when orjson is available
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Platform-dependent Wi-Fi scanning library, imported once at startup
+try:
+    if os.name == 'nt':
+        import pywifi as _wifi_mod  # Use pywifi for Windows compatibility
+    else:
+        import wifi as _wifi_mod  # Use wifi for Linux/Unix-based systems
+except ImportError:
+    _wifi_mod = None
+
 # Custom Exception Classes
 class LocationError(Exception):
     """Base class for exceptions in this module."""
@@ -42,14 +67,47 @@ class ConfigurationError(LocationError):
         self.message = message
         super().__init__(self.message)
 
+# Seconds a connectivity check result is reused before probing again
+CONNECTIVITY_CACHE_TTL = 30
+_last_net_check = None  # (monotonic timestamp, result) of the last probe
+
+# JSON helpers (orjson if installed, standard library otherwise)
+def _json_dumps(obj):
+    """Serialize an object to JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode()
+
+def _json_loads(data):
+    """Deserialize JSON bytes or text."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
 # Function to check internet connection
 def is_connected():
+    global _last_net_check
+    now = time.monotonic()
+    if _last_net_check is not None and now - _last_net_check[0] < CONNECTIVITY_CACHE_TTL:
+        return _last_net_check[1]
+    # A UDP connect to an external server (e.g., Google's DNS server) sends no packets,
+    # it only checks that the system has a route to the internet
+    probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    probe.settimeout(1)
     try:
-        # Try connecting to an external server (e.g., Google's DNS server)
-        socket.create_connection(("8.8.8.8", 53), timeout=5)
-        return True
+        probe.connect(("8.8.8.8", 53))
+        connected = True
     except OSError:
-        return False
+        connected = False
+    finally:
+        probe.close()
+    _last_net_check = (now, connected)
+    return connected
+
+# Cached Fernet cipher (rebuilt only when the encryption key changes)
+@functools.lru_cache(maxsize=1)
+def _build_cipher(encryption_key):
+    return Fernet(encryption_key)
 
 # Base Class for Configuration Handling
 class ConfigHandler:
@@ -57,6 +115,7 @@ class ConfigHandler:
         self._api_key = None
         self._encryption_key = None
         self._encrypted_api_key = None
+        self._encrypted_api_key_mtime = None
 
     def _load_config(self):
         """Load configuration from environment or config file."""
@@ -95,22 +154,28 @@ class ConfigHandler:
 
     def _decrypt_api_key(self, encrypted_api_key: bytes):
         """Decrypt the API key using the stored encryption key."""
-        cipher_suite = Fernet(self._get_encryption_key())
+        cipher_suite = _build_cipher(self._get_encryption_key())
         decrypted_key = cipher_suite.decrypt(encrypted_api_key).decode()
         return decrypted_key
 
     def _read_encrypted_api_key_from_file(self):
         """Read encrypted API key from a file (this is a simple placeholder)."""
-        with open('encrypted_api_key.bin', 'rb') as file:
-            encrypted_api_key = file.read()
-        return encrypted_api_key
+        # Only re-read the file when its modification time has changed
+        mtime = os.stat('encrypted_api_key.bin').st_mtime
+        if self._encrypted_api_key is None or mtime != self._encrypted_api_key_mtime:
+            with open('encrypted_api_key.bin', 'rb') as file:
+                self._encrypted_api_key = file.read()
+            self._encrypted_api_key_mtime = mtime
+        return self._encrypted_api_key
 
     def _get_encryption_key(self):
         """Get encryption key (could be stored in an environment variable)."""
-        encryption_key = os.getenv('ENCRYPTION_KEY')
-        if not encryption_key:
-            raise APIKeyError("Encryption key not found in environment variables.")
-        return encryption_key
+        if not self._encryption_key:
+            encryption_key = os.getenv('ENCRYPTION_KEY')
+            if not encryption_key:
+                raise APIKeyError("Encryption key not found in environment variables.")
+            self._encryption_key = encryption_key
+        return self._encryption_key
 
     @property
     def api_key(self):
@@ -119,33 +184,125 @@ class ConfigHandler:
             self._load_config()
         return self._api_key
 
+# SQL statements, kept constant so sqlite3 reuses their prepared statements
+_CREATE_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS location_log (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TEXT NOT NULL,
+        ip TEXT,
+        city TEXT,
+        region TEXT,
+        country TEXT
+    )
+'''
+_INSERT_SQL = "INSERT INTO location_log (timestamp, ip, city, region, country) VALUES (?, ?, ?, ?, ?)"
+_SELECT_MAX_ID_SQL = "SELECT MAX(id) FROM location_log"
+_SELECT_BACKLOG_SQL = "SELECT id, timestamp, ip, city, region, country FROM location_log WHERE id <= ? ORDER BY id"
+_DELETE_BACKLOG_SQL = "DELETE FROM location_log WHERE id <= ?"
+_DELETE_ROW_SQL = "DELETE FROM location_log WHERE id = ?"
+
+# Fields used from IP geolocation responses
+LOCATION_FIELDS = ('ip', 'city', 'region', 'country')
+_REQUIRED_LOCATION_KEYS = frozenset(LOCATION_FIELDS)
+
+# Request headers shared by all JSON POSTs
+_JSON_HEADERS = {"Content-Type": "application/json"}
+_GZIP_JSON_HEADERS = {"Content-Type": "application/json", "Content-Encoding": "gzip"}
+
+# Format of timestamps stored locally and sent to the remote database
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Seconds the public IP address is reused before asking ipify again
+PUBLIC_IP_CACHE_TTL = 600
+
+# Bulk sync responses meaning the receiver doesn't support the bulk endpoint or gzip body
+BULK_UNSUPPORTED_STATUS_CODES = (404, 405, 415, 501)
+# Bulk sync responses to a gzip body that may mean the receiver can't decode it
+BULK_GZIP_REJECTED_STATUS_CODES = (400, 415)
+
+# Maximum concurrent POSTs when the receiver has no bulk endpoint
+SYNC_MAX_WORKERS = 8
+
+# Polling used while waiting for a pywifi scan to complete (up to 2 seconds)
+WIFI_SCAN_POLL_INTERVAL = 0.1
+WIFI_SCAN_MAX_POLLS = 20
+
+# Wi-Fi geolocation results are reused for identical access point sets
+WIFI_CACHE_TTL = 3 * 3600  # Must outlast a tracking interval so adjacent ticks can reuse entries
+WIFI_CACHE_TICKS = 3  # Entries stay valid for at least this many tracking intervals
+WIFI_CACHE_MAX_ENTRIES = 32
+WIFI_SIGNAL_BUCKET = 5  # dBm; small signal fluctuations map to the same cache key
+
 # Base Class for Location Tracking
 class LocationTracker:
     def __init__(self, db_name='locations.db'):
         self.db_name = db_name
-        self.remote_database_url = None
         self._tracker_recevier_ip = '192.168.0.10' # for testing purposes
         self._tracker_recevier_port = 8080 # for testing purposes
+        # Construct the remote database URLs using the custom given IP
+        self.remote_database_url = f'https://{self._tracker_recevier_ip}:{self._tracker_recevier_port}/v1/geotracker' # for testing purposes
+        self.remote_bulk_url = f'{self.remote_database_url}/bulk'
         self.config_handler = ConfigHandler()  # Configuration handling
+        self.session = self._create_session()  # Shared HTTP session (keep-alive + retries)
+        self.conn = None
+        self._pending = []  # Local records not yet written to SQLite (e.g. after a failed write)
+        self._public_ip_cache = None  # (monotonic timestamp, public IP)
+        self._bulk_gzip = True  # Cleared once the receiver only accepts uncompressed bulk bodies
+        self._geo_url = None  # Google Geolocation URL, built once the API key is loaded
+        self._wifi_iface = None  # pywifi interface, enumerated on first scan
+        self._wifi_cache = OrderedDict()  # Access point fingerprint -> (monotonic timestamp, location data)
+        self._wifi_cache_ttl = WIFI_CACHE_TTL
         self.create_database()  # Create SQLite database
+        atexit.register(self.flush_pending)  # Retry any unwritten records on shutdown
+
+    def _create_session(self):
+        """Create a pooled HTTP session so connections are reused across requests."""
+        session = requests.Session()
+        retries = Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+        adapter = HTTPAdapter(pool_maxsize=16, max_retries=retries)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers.update({'Connection': 'keep-alive'})
+        return session
+
+    def _connect(self):
+        """Open the long-lived SQLite connection used by all database operations."""
+        conn = sqlite3.connect(self.db_name, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")  # Readers and writers don't block each other
+        conn.execute("PRAGMA synchronous=NORMAL")  # Safe with WAL, avoids an fsync per commit
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-8000")  # ~8 MB page cache
+        return conn
+
+    def _post_json(self, url, payload, compress=False):
+        """POST a payload serialized as JSON (optionally gzip-compressed) and return the response."""
+        body = _json_dumps(payload)
+        if compress:
+            body = gzip.compress(body, compresslevel=1)  # Fast level, repetitive JSON still shrinks well
+            return self.session.post(url, data=body, headers=_GZIP_JSON_HEADERS)
+        return self.session.post(url, data=body, headers=_JSON_HEADERS)
+
+    def close(self):
+        """Close the SQLite connection and HTTP session."""
+        self.flush_pending()
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def create_database(self):
         """Create the SQLite database and the locations table if it doesn't exist."""
         try:
-            conn = sqlite3.connect(self.db_name)
-            cursor = conn.cursor()
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS location_log (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp TEXT NOT NULL,
-                    ip TEXT,
-                    city TEXT,
-                    region TEXT,
-                    country TEXT
-                )
-            ''')
-            conn.commit()
-            conn.close()
+            if self.conn is None:
+                self.conn = self._connect()
+            with self.conn:
+                self.conn.execute(_CREATE_TABLE_SQL)
             logging.info("Database created or already exists.")
         except sqlite3.DatabaseError as e:
             logging.error(f"Database creation error: {e}")
@@ -155,40 +312,53 @@ class LocationTracker:
         """Log the location data to the SQLite database or remote database depending on internet connectivity."""
         try:
             if is_connected():
-                self.send_to_remote_database(location_data)
-            else:
-                self.store_locally(location_data)
+                try:
+                    self.send_to_remote_database(location_data)
+                    return
+                except NetworkError:
+                    # The route check can pass while the uplink is down; keep the record for a later sync
+                    logging.warning("Remote database unreachable, storing location locally.")
+            self.store_locally(location_data)
         except Exception as e:
             logging.error(f"Error logging location: {e}")
 
+    def _get_public_ip(self):
+        """Get the public IP address from an external API (e.g., ipify or httpbin), cached for a few minutes."""
+        now = time.monotonic()
+        if self._public_ip_cache is not None and now - self._public_ip_cache[0] < PUBLIC_IP_CACHE_TTL:
+            return self._public_ip_cache[1]
+
+        ip_response = self.session.get('https://api.ipify.org')
+        ip_response.raise_for_status()  # Check if the request was successful
+        current_ip = ip_response.text  # Extract the IP address from the response
+        self._public_ip_cache = (now, current_ip)
+        return current_ip
+
+    def _build_remote_payload(self, location_data, current_ip, remote_timestamp):
+        """Prepare a location record in the format expected by the remote database."""
+        return {
+            'timestamp': location_data.get('timestamp'),
+            'ip': location_data.get('ip'),
+            'city': location_data.get('city', 'Unknown'),
+            'region': location_data.get('region', 'Unknown'),
+            'country': location_data.get('country', 'Unknown'),
+            'public_ip': current_ip,  # New column for public IP
+            'remote_timestamp': remote_timestamp  # New column for remote timestamp
+        }
+
     def send_to_remote_database(self, location_data):
         """Send location data to the remote database."""
         try:
-            # Get the public IP address from an external API (e.g., ipify or httpbin)
-            ip_response = requests.get('https://api.ipify.org')
-            ip_response.raise_for_status()  # Check if the request was successful
-            current_ip = ip_response.text  # Extract the IP address from the response
-            
-            # Construct the remote database URL using the custom given IP
-            self._tracker_recevier_ip
-            self.remote_database_url = f'https://{self._tracker_recevier_ip}:{self._tracker_recevier_port}/v1/geotracker' # for testing purposes
-            
+            current_ip = self._get_public_ip()
+
             # Create a timestamp for the remote database
-            remote_timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
+            remote_timestamp = time.strftime(TIMESTAMP_FORMAT)
+
             # Prepare the data to be sent
-            data = {
-                'timestamp': location_data.get('timestamp'),
-                'ip': location_data.get('ip'),
-                'city': location_data.get('city', 'Unknown'),
-                'region': location_data.get('region', 'Unknown'),
-                'country': location_data.get('country', 'Unknown'),
-                'public_ip': current_ip,  # New column for public IP
-                'remote_timestamp': remote_timestamp  # New column for remote timestamp
-            }
+            data = self._build_remote_payload(location_data, current_ip, remote_timestamp)
 
             # Assuming you're sending data as a POST request
-            response = requests.post(self.remote_database_url, json=data) # Send the data as a POST request
+            response = self._post_json(self.remote_database_url, data) # Send the data as a POST request
             response.raise_for_status()
 
             logging.info(f"Location data sent to remote database: {location_data.get('city')}, {location_data.get('country')}")
@@ -198,61 +368,147 @@ class LocationTracker:
 
     def store_locally(self, location_data):
         """Store location data in SQLite database for later sync."""
+        timestamp = time.strftime(TIMESTAMP_FORMAT)
+        self._pending.append((timestamp, location_data.get('ip'), location_data.get('city', 'Unknown'),
+                              location_data.get('region', 'Unknown'), location_data.get('country', 'Unknown')))
+        # Write through right away so offline records survive a crash or SIGTERM;
+        # records from a failed write stay pending and are retried with the next one
+        self.flush_pending()
+        logging.info(f"Location logged locally: {location_data.get('city')}, {location_data.get('country')}")
+
+    def flush_pending(self):
+        """Write all pending location records to the SQLite database in one transaction."""
+        if not self._pending or self.conn is None:
+            return
         try:
-            conn = sqlite3.connect(self.db_name)
-            cursor = conn.cursor()
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            cursor.execute('''
-                INSERT INTO location_log (timestamp, ip, city, region, country)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (timestamp, location_data.get('ip'), location_data.get('city', 'Unknown'),
-                  location_data.get('region', 'Unknown'), location_data.get('country', 'Unknown')))
-            conn.commit()
-            conn.close()
-            logging.info(f"Location logged locally: {location_data.get('city')}, {location_data.get('country')}")
+            with self.conn:
+                self.conn.executemany(_INSERT_SQL, self._pending)
+            self._pending.clear()
         except sqlite3.DatabaseError as e:
             logging.error(f"Database error while logging location: {e}")
             raise DatabaseError(f"Error logging location to the database: {e}")
 
+    def _post_bulk(self, payload):
+        """POST the backlog to the bulk endpoint, retrying uncompressed if the receiver can't read gzip."""
+        response = self._post_json(self.remote_bulk_url, payload, compress=self._bulk_gzip)
+        if self._bulk_gzip and response.status_code in BULK_GZIP_REJECTED_STATUS_CODES:
+            logging.warning(f"Compressed bulk sync rejected with status {response.status_code}, retrying uncompressed.")
+            response = self._post_json(self.remote_bulk_url, payload)
+            if response.status_code < 400:
+                self._bulk_gzip = False  # Receiver doesn't decode gzip; stop compressing bulk bodies
+        return response
+
+    def _post_rows_individually(self, ids, payload):
+        """Fallback for receivers without the bulk endpoint: POST records concurrently and return the synced ids."""
+        synced_ids = []
+        with ThreadPoolExecutor(max_workers=SYNC_MAX_WORKERS) as executor:
+            futures = {
+                executor.submit(self._post_row, data): row_id
+                for row_id, data in zip(ids, payload)
+            }
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                    synced_ids.append(futures[future])
+                except requests.exceptions.RequestException as e:
+                    logging.error(f"Error sending data to remote database: {e}")
+        return synced_ids
+
+    def _post_row(self, data):
+        """POST a single record to the remote database."""
+        response = self._post_json(self.remote_database_url, data)
+        response.raise_for_status()
+
     def sync_local_data_to_remote(self):
         """Sync all local data to the remote database when internet connection is available."""
         try:
-            conn = sqlite3.connect(self.db_name)
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM location_log")
-            rows = cursor.fetchall()
-            for row in rows:
-                location_data = {
-                    'timestamp': row[1],  # SQLite timestamp
-                    'ip': row[2],
-                    'city': row[3],
-                    'region': row[4],
-                    'country': row[5]
-                }
-                self.send_to_remote_database(location_data)
-                cursor.execute("DELETE FROM location_log WHERE id = ?", (row[0],))  # Delete after syncing
-            conn.commit()
-            conn.close()
-            logging.info("Local data synced to remote database.")
+            self.flush_pending()  # Make sure pending records are part of this sync
+            # Bound the sync to the rows that exist now; later inserts wait for the next sync
+            max_id = self.conn.execute(_SELECT_MAX_ID_SQL).fetchone()[0]
+            if max_id is None:
+                return
+
+            # Fetch the public IP once for the whole batch
+            try:
+                current_ip = self._get_public_ip()
+            except requests.exceptions.RequestException as e:
+                logging.error(f"Error fetching public IP for sync: {e}")
+                raise NetworkError(f"Error syncing local data to remote: {e}")
+
+            remote_timestamp = time.strftime(TIMESTAMP_FORMAT)  # One timestamp for the whole batch
+            ids = []
+            payload = []
+            # Build the payload straight from the cursor instead of materializing all rows first
+            cursor = self.conn.execute(_SELECT_BACKLOG_SQL, (max_id,))
+            for row_id, timestamp, ip, city, region, country in cursor:
+                ids.append(row_id)
+                payload.append(self._build_remote_payload({
+                    'timestamp': timestamp,  # SQLite timestamp
+                    'ip': ip,
+                    'city': city,
+                    'region': region,
+                    'country': country
+                }, current_ip, remote_timestamp))
+
+            # Send the whole backlog in a single request
+            try:
+                response = self._post_bulk({'events': payload})
+                response.raise_for_status()
+                synced_ids = ids
+            except requests.exceptions.HTTPError as e:
+                if response.status_code not in BULK_UNSUPPORTED_STATUS_CODES:
+                    # Server-side failure: keep the rows for the next sync instead of fanning out
+                    logging.error(f"Error sending data to remote database: {e}")
+                    raise NetworkError(f"Error syncing local data to remote: {e}")
+                logging.warning(f"Bulk sync not supported by remote database ({e}), falling back to per-row sync.")
+                synced_ids = self._post_rows_individually(ids, payload)
+            except requests.exceptions.RequestException as e:
+                logging.error(f"Error sending data to remote database: {e}")
+                raise NetworkError(f"Error syncing local data to remote: {e}")
+
+            # Delete the synced rows in a single transaction
+            with self.conn:
+                if len(synced_ids) == len(ids):
+                    self.conn.execute(_DELETE_BACKLOG_SQL, (max_id,))
+                elif synced_ids:
+                    # One statement per id keeps clear of SQLite's bound-parameter limit on large backlogs
+                    self.conn.executemany(_DELETE_ROW_SQL, [(row_id,) for row_id in synced_ids])
+
+            if len(synced_ids) < len(ids):
+                raise NetworkError(f"Only {len(synced_ids)} of {len(ids)} local records synced to remote database.")
+            logging.info(f"Local data synced to remote database: {len(ids)} records.")
         except sqlite3.DatabaseError as e:
             logging.error(f"Error syncing local data to remote: {e}")
             raise DatabaseError(f"Error syncing local data to remote: {e}")
 
     def track_location(self, interval_seconds=3600):
         """Continuously track the location and log it at regular intervals."""
-        while True:
-            try:
-                location_data = self.get_location()
+        # Keep Wi-Fi lookups valid across several ticks, however long the interval is
+        self._wifi_cache_ttl = max(WIFI_CACHE_TTL, WIFI_CACHE_TICKS * interval_seconds)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            while True:
+                # Sync local data to remote in the background (if internet is available)
+                # while the Wi-Fi scan and geolocation lookups run
+                sync_future = executor.submit(self.sync_local_data_to_remote) if is_connected() else None
+                try:
+                    location_data = self.get_location()
+                except LocationError as e:
+                    logging.error(f"Location error: {e}")
+                    print(f"Error: {e}")
+                    location_data = None
+
+                # Wait for the sync before logging so database access stays on one thread at a time
+                if sync_future is not None:
+                    try:
+                        sync_future.result()
+                    except LocationError as e:
+                        logging.error(f"Location error: {e}")
+                        print(f"Error: {e}")
+
                 if location_data:
                     self.log_location(location_data)
                     print(f"Location logged: {location_data.get('city')}, {location_data.get('country')}")
-                    # Sync local data to remote if internet is available
-                    if is_connected():
-                        self.sync_local_data_to_remote()
-            except LocationError as e:
-                logging.error(f"Location error: {e}")
-                print(f"Error: {e}")
-            time.sleep(interval_seconds)
+                time.sleep(interval_seconds)
 
     def get_location(self):
         """Fetch location data using either IP geolocation or Wi-Fi geolocation."""
@@ -276,9 +532,11 @@ class LocationTracker:
         
         try:
             # Use IP-based geolocation as a fallback
-            response = requests.get("https://ipinfo.io")
+            response = self.session.get("https://ipinfo.io")
             response.raise_for_status()  # Raise HTTPError for bad responses
-            location_data = response.json()
+            parsed = _json_loads(response.content)
+            # Keep only the fields the tracker uses
+            location_data = {key: parsed[key] for key in LOCATION_FIELDS if key in parsed}
 
             # Validate the location data to ensure it contains necessary info
             if not self.validate_location_data(location_data):
@@ -287,21 +545,19 @@ class LocationTracker:
             
             logging.info(f"Location fetched from IP: {location_data.get('city')}, {location_data.get('country')}")
             return location_data
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, ValueError) as e:  # ValueError: malformed JSON
             logging.error(f"Network error while fetching location: {e}")
             raise NetworkError(f"Error fetching location: {e}")
 
     def validate_location_data(self, location_data):
         """Validate location data to ensure necessary keys exist."""
-        required_keys = ['ip', 'city', 'region', 'country']
-        
-        for key in required_keys:
-            if key not in location_data:
-                logging.warning(f"Missing key: {key} in location data.")
-                return False
+        if not _REQUIRED_LOCATION_KEYS.issubset(location_data):
+            missing = ', '.join(sorted(_REQUIRED_LOCATION_KEYS.difference(location_data)))
+            logging.warning(f"Missing key: {missing} in location data.")
+            return False
         
         # Further validation (optional): Check if any values are empty or invalid
-        if not location_data['ip'] or not location_data['city'] or not location_data['region'] or not location_data['country']:
+        if not all(location_data[key] for key in _REQUIRED_LOCATION_KEYS):
             logging.warning("One or more values in location data are empty.")
             return False
         
@@ -311,14 +567,17 @@ class LocationTracker:
         """Scan for nearby Wi-Fi networks, platform-dependent."""
         wifi_networks = []
 
+        if _wifi_mod is None:
+            logging.warning("Wi-Fi scanning library not installed, skipping Wi-Fi scan.")
+            return wifi_networks
+
         # Check platform and use appropriate Wi-Fi scanning method
         if os.name == 'nt':  # If running on Windows
-            import pywifi  # Use pywifi for Windows compatibility
-            wifi_interface = pywifi.PyWiFi().interfaces()[0]
-            wifi_networks = self._scan_pywifi(wifi_interface)
+            if self._wifi_iface is None:
+                self._wifi_iface = _wifi_mod.PyWiFi().interfaces()[0]
+            wifi_networks = self._scan_pywifi(self._wifi_iface)
         else:
-            import wifi  # Use wifi for Linux/Unix-based systems
-            networks = wifi.Cell.all('wlan0')  # 'wlan0' is the network interface (adjust if needed)
+            networks = _wifi_mod.Cell.all('wlan0')  # 'wlan0' is the network interface (adjust if needed)
             wifi_networks = self._scan_wifi(networks)
         
         return wifi_networks
@@ -337,9 +596,21 @@ class LocationTracker:
     def _scan_pywifi(self, wifi_interface):
         """Helper function for scanning Wi-Fi on Windows using pywifi"""
         wifi_networks = []
+        # scan_results() returns the previous scan's list until the new scan completes,
+        # so snapshot it to tell fresh results apart from stale ones
+        previous = self._pywifi_fingerprint(wifi_interface.scan_results())
         wifi_interface.scan()  # Start the scan
-        time.sleep(2)  # Give some time for scan to complete
-        networks = wifi_interface.scan_results()
+        # Poll until the scan has finished instead of always waiting the full scan time
+        networks = []
+        for _ in range(WIFI_SCAN_MAX_POLLS):
+            time.sleep(WIFI_SCAN_POLL_INTERVAL)
+            if wifi_interface.status() == _wifi_mod.const.IFACE_SCANNING:
+                continue
+            networks = wifi_interface.scan_results()
+            if self._pywifi_fingerprint(networks) != previous:
+                break
+        else:
+            networks = wifi_interface.scan_results()  # Time limit reached, use the latest results
         for network in networks:
             wifi_networks.append({
                 'SSID': network.ssid,
@@ -348,10 +619,32 @@ class LocationTracker:
             })
         return wifi_networks
 
+    def _pywifi_fingerprint(self, networks):
+        """Identify a pywifi scan result list by its access points and signal strengths."""
+        return sorted((network.bssid, network.signal) for network in networks)
+
+    def _wifi_cache_key(self, wifi_networks):
+        """Fingerprint a set of access points by MAC address and bucketed signal strength."""
+        fingerprint = sorted(
+            (network['MAC'], round(network['Signal Strength'] / WIFI_SIGNAL_BUCKET) * WIFI_SIGNAL_BUCKET)
+            for network in wifi_networks
+        )
+        return hashlib.blake2b(_json_dumps(fingerprint)).digest()
+
     def get_geolocation_from_wifi(self, wifi_networks):
         """Get location based on nearby Wi-Fi networks using Google Geolocation API."""
-        url = "https://www.googleapis.com/geolocation/v1/geolocate?key=" + self.config_handler.api_key
-        headers = {"Content-Type": "application/json"}
+        # Reuse the previous result if the surrounding access points haven't changed
+        cache_key = self._wifi_cache_key(wifi_networks)
+        cached = self._wifi_cache.get(cache_key)
+        if cached is not None:
+            if time.monotonic() - cached[0] < self._wifi_cache_ttl:
+                self._wifi_cache.move_to_end(cache_key)
+                logging.info("Location derived from cached Wi-Fi lookup.")
+                return cached[1]
+            del self._wifi_cache[cache_key]
+
+        if self._geo_url is None:
+            self._geo_url = "https://www.googleapis.com/geolocation/v1/geolocate?key=" + self.config_handler.api_key
         
         # Prepare the payload with nearby Wi-Fi networks
         payload = {
@@ -366,34 +659,53 @@ class LocationTracker:
         }
         
         try:
-            response = requests.post(url, json=payload, headers=headers)
+            response = self._post_json(self._geo_url, payload)
             response.raise_for_status()  # Raise an exception for bad HTTP responses
-            location_data = response.json()
+            location_data = _json_loads(response.content)
             logging.info("Location derived from Wi-Fi networks.")
+
+            self._wifi_cache[cache_key] = (time.monotonic(), location_data)
+            if len(self._wifi_cache) > WIFI_CACHE_MAX_ENTRIES:
+                self._wifi_cache.popitem(last=False)  # Evict the least recently used entry
             return location_data
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, ValueError) as e:  # ValueError: malformed JSON
             logging.error(f"Error fetching location from Wi-Fi data: {e}")
             return None
 
+# Logging setup: records are queued and written to disk by a background thread
+def setup_logging():
+    log_queue = queue.Queue(-1)
+    file_handler = logging.handlers.RotatingFileHandler(
+        'location_tracker.log',
+        maxBytes=10_000_000,
+        backupCount=3
+    )
+    file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    listener = logging.handlers.QueueListener(log_queue, file_handler)
+
+    root_logger = logging.getLogger()
+    root_logger.setLevel(logging.DEBUG)
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener.start()
+    return listener
+
 # Main Application
 def main():
-    logging.basicConfig(
-        filename='location_tracker.log', 
-        level=logging.DEBUG, 
-        format='%(asctime)s - %(levelname)s - %(message)s'
-    )
+    log_listener = setup_logging()
     
     logging.info("Starting location tracker.")
     
     try:
-        tracker = LocationTracker()
-        tracker.track_location(interval_seconds=3600)  # Track every hour
+        with LocationTracker() as tracker:
+            tracker.track_location(interval_seconds=3600)  # Track every hour
     except LocationError as e:
         logging.error(f"Failed to start location tracker: {e}")
         print(f"Error: {e}")
     except KeyboardInterrupt:
         logging.info("Location tracker stopped by user.")
         print("Tracker stopped.")
+    finally:
+        log_listener.stop()  # Write out any queued log records
 
 if __name__ == "__main__":
     main()